@@ -1,28 +1,97 @@
 import os
-from typing import Any, Dict, Optional
-
-from flask import Flask, jsonify, request, render_template, redirect, url_for, session, flash
-from werkzeug.security import generate_password_hash, check_password_hash
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import ObjectId, json_util
+from flask import Flask, Response, request, render_template, redirect, url_for, session, flash
+from werkzeug.security import check_password_hash
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
 from dotenv import load_dotenv
+import orjson
 from pymongo.errors import PyMongoError, DuplicateKeyError
 
+from cache import cache
 from db import (
     ensure_users_collection,
     list_user_collections,
     get_collection_fields,
     fetch_collection_documents,
     is_valid_identifier,
+    invalidate_schema,
+    invalidate_collections,
     insert_user,
     find_user_by_name,
+    update_user_password,
     insert_document,
+    insert_documents,
     update_document,
     delete_document,
+    update_and_fetch,
+    delete_and_fetch,
     get_database,
 )
 
 app = Flask(__name__)
 load_dotenv()
 app.secret_key = os.getenv("FLASK_SECRET_KEY", "dev-secret-change-me")
+cache.init_app(
+    app,
+    config={
+        "CACHE_TYPE": os.getenv("CACHE_TYPE", "SimpleCache"),
+        "CACHE_DEFAULT_TIMEOUT": int(os.getenv("CACHE_DEFAULT_TIMEOUT", "60")),
+    },
+)
+
+
+# OWASP-recommended Argon2id parameters: 46 MiB memory, 3 passes, 1 lane.
+_hasher = PasswordHasher(time_cost=3, memory_cost=46 * 1024, parallelism=1)
+# Verified against when a login names an unknown user, so that case costs the
+# same as a wrong password and response times do not reveal which names exist.
+_DUMMY_HASH = _hasher.hash("dummy")
+# argon2-cffi releases the GIL while hashing, so threaded workers keep serving
+# other requests; this caps how many KDFs run at once so a burst of logins
+# cannot occupy every core.
+_HASH_SLOTS = threading.BoundedSemaphore(os.cpu_count() or 1)
+
+
+def hash_password(password: str) -> str:
+    with _HASH_SLOTS:
+        return _hasher.hash(password)
+
+
+def verify_password(stored_hash: str, password: str) -> Tuple[bool, bool]:
+    """Check a password against its stored hash.
+
+    Returns ``(ok, needs_rehash)``. Hashes created by Werkzeug before the
+    switch to Argon2 are still accepted and flagged for an upgrade.
+    """
+    with _HASH_SLOTS:
+        if not stored_hash.startswith("$argon2"):
+            return check_password_hash(stored_hash, password), True
+        try:
+            _hasher.verify(stored_hash, password)
+        except (VerificationError, InvalidHashError):
+            return False, False
+    return True, _hasher.check_needs_rehash(stored_hash)
+
+
+_TRUTHY = frozenset({"true", "1", "yes", "on"})
+
+
+def _to_number(value: str) -> Any:
+    """Parse integers without an exception round-trip; fall back to float."""
+    if value.lstrip("+-").isdigit():
+        return int(value)
+    return float(value)
+
+
+# Form field type (the `<field>_type` select) -> value converter.
+_COERCE = {
+    "number": _to_number,
+    "boolean": lambda value: value.lower() in _TRUTHY,
+    "string": str,
+}
 
 
 @app.route("/health", methods=["GET"])
@@ -30,14 +99,32 @@ def health() -> Any:
     return {"status": "ok"}
 
 
+def _home_cache_key(*args: Any, **kwargs: Any) -> str:
+    generation = cache.get("home:generation") or 0
+    return f"home:{generation}:{session.get('user_id', 'anon')}"
+
+
+def _invalidate_home() -> None:
+    """Expire every user's cached dashboard after the collection list changes."""
+    cache.inc("home:generation")
+
+
 @app.route("/", methods=["GET"])
+@cache.cached(
+    timeout=15,
+    make_cache_key=_home_cache_key,
+    # Pending flash messages are rendered into the page, so never cache them.
+    unless=lambda: "_flashes" in session,
+)
 def home() -> Any:
     user_name = session.get("user_name")
     collections = []
-    try:
-        collections = list_user_collections()
-    except PyMongoError:
-        pass
+    # The collection list is only rendered for signed-in users.
+    if user_name:
+        try:
+            collections = list_user_collections()
+        except PyMongoError:
+            pass
     return render_template("home.html", user_name=user_name, tables=collections)
 
 
@@ -60,6 +147,9 @@ def create_table() -> Any:
         # We'll create it explicitly here
         db = get_database()
         db.create_collection(collection_name)
+        invalidate_schema(collection_name)
+        invalidate_collections()
+        _invalidate_home()
         flash(f"Collection '{collection_name}' is ready.", "success")
     except PyMongoError as exc:
         flash(f"Create collection failed: {exc}", "error")
@@ -89,33 +179,18 @@ def insert_row(table: str) -> Any:
         flash("Invalid collection name", "error")
         return redirect(url_for("home"))
     
-    fields = get_collection_fields(table)
     # Build document from form data, excluding _id and processing types
+    form = request.form
+    field_types = {key[:-5]: value for key, value in form.items() if key.endswith("_type")}
     document = {}
-    
-    for key, value in request.form.items():
-        # Skip type indicators and _id
-        if key.endswith("_type") or key == "_id":
+    for key, value in form.items():
+        if not value or key == "_id" or key.endswith("_type"):
             continue
-        
-        # Get the type for this field
-        field_type = request.form.get(f"{key}_type", "string")
-        
-        # Convert value based on type
-        if value:
-            try:
-                if field_type == "number":
-                    # Try int first, then float
-                    try:
-                        document[key] = int(value)
-                    except ValueError:
-                        document[key] = float(value)
-                elif field_type == "boolean":
-                    document[key] = value.lower() in ("true", "1", "yes", "on")
-                else:
-                    document[key] = value
-            except (ValueError, AttributeError):
-                document[key] = value
+        coerce = _COERCE.get(field_types.get(key, "string"), str)
+        try:
+            document[key] = coerce(value)
+        except ValueError:
+            document[key] = value
     
     if not document:
         flash("No data to insert", "error")
@@ -123,12 +198,34 @@ def insert_row(table: str) -> Any:
     
     try:
         insert_document(table, document)
+        invalidate_schema(table)
         flash("Document inserted.", "success")
     except PyMongoError as exc:
         flash(f"Insert failed: {exc}", "error")
     return redirect(url_for("view_table", table=table))
 
 
+@app.route("/tables/<table>/rows/bulk", methods=["POST"])
+def bulk_insert_rows(table: str) -> Any:
+    if not session.get("user_id"):
+        return {"error": "login required"}, 401
+    if not is_valid_identifier(table):
+        return {"error": "invalid collection name"}, 400
+
+    documents = request.get_json(force=True, silent=True)
+    if not documents or not isinstance(documents, list) or not all(isinstance(d, dict) for d in documents):
+        return {"error": "expected a non-empty JSON array of objects"}, 400
+    # _id is always generated by the server, as for the JSON editor.
+    documents = [{k: v for k, v in d.items() if k != "_id"} for d in documents]
+
+    try:
+        inserted_ids = insert_documents(table, documents)
+        invalidate_schema(table)
+        return {"inserted": len(inserted_ids), "ids": inserted_ids}, 201
+    except PyMongoError as exc:
+        return {"error": str(exc)}, 500
+
+
 @app.route("/tables/<table>/rows/update", methods=["POST"])
 def update_row(table: str) -> Any:
     if not session.get("user_id"):
@@ -142,6 +239,10 @@ def update_row(table: str) -> Any:
     if not doc_id:
         flash("Document ID missing", "error")
         return redirect(url_for("view_table", table=table))
+    if not ObjectId.is_valid(doc_id):
+        flash("Invalid document ID", "error")
+        return redirect(url_for("view_table", table=table))
+    oid = ObjectId(doc_id)
     
     # Support two update modes:
     # 1) A single `document_json` form field containing the full document as JSON
@@ -150,16 +251,17 @@ def update_row(table: str) -> Any:
     updates = {}
     if document_json:
         try:
-            import json
-
-            parsed = json.loads(document_json)
-            # Remove _id if present - we don't allow editing it
-            parsed.pop("_id", None)
-            if isinstance(parsed, dict):
-                updates = parsed
-        except Exception:
+            parsed = orjson.loads(document_json)
+        except orjson.JSONDecodeError:
             flash("Invalid JSON provided for update.", "error")
             return redirect(url_for("view_table", table=table))
+        if isinstance(parsed, list):
+            # An array of documents is treated as a bulk insert.
+            return _insert_json_documents(table, parsed)
+        if isinstance(parsed, dict):
+            # Remove _id if present - we don't allow editing it
+            parsed.pop("_id", None)
+            updates = parsed
     else:
         fields = get_collection_fields(table)
         for field in fields:
@@ -173,13 +275,28 @@ def update_row(table: str) -> Any:
         return redirect(url_for("view_table", table=table))
 
     try:
-        update_document(table, doc_id, updates)
+        update_document(table, oid, updates)
+        invalidate_schema(table)
         flash("Document updated.", "success")
     except PyMongoError as exc:
         flash(f"Update failed: {exc}", "error")
     return redirect(url_for("view_table", table=table))
 
 
+def _insert_json_documents(table: str, documents: List[Any]) -> Any:
+    documents = [{k: v for k, v in d.items() if k != "_id"} for d in documents if isinstance(d, dict)]
+    if not documents:
+        flash("No documents to insert", "error")
+        return redirect(url_for("view_table", table=table))
+    try:
+        inserted_ids = insert_documents(table, documents)
+        invalidate_schema(table)
+        flash(f"{len(inserted_ids)} documents inserted.", "success")
+    except PyMongoError as exc:
+        flash(f"Insert failed: {exc}", "error")
+    return redirect(url_for("view_table", table=table))
+
+
 @app.route("/tables/<table>/rows/delete", methods=["POST"])
 def delete_row(table: str) -> Any:
     if not session.get("user_id"):
@@ -193,15 +310,72 @@ def delete_row(table: str) -> Any:
     if not doc_id:
         flash("Document ID missing", "error")
         return redirect(url_for("view_table", table=table))
+    if not ObjectId.is_valid(doc_id):
+        flash("Invalid document ID", "error")
+        return redirect(url_for("view_table", table=table))
+    oid = ObjectId(doc_id)
     
     try:
-        delete_document(table, doc_id)
+        delete_document(table, oid)
+        invalidate_schema(table)
         flash("Document deleted.", "success")
     except PyMongoError as exc:
         flash(f"Delete failed: {exc}", "error")
     return redirect(url_for("view_table", table=table))
 
 
+def _document_response(document: Dict[str, Any]) -> Response:
+    # Documents can hold BSON types the JSON provider cannot encode (nested
+    # ObjectIds, Decimal128, binary...); emit them as relaxed Extended JSON.
+    body = json_util.dumps(document, json_options=json_util.RELAXED_JSON_OPTIONS)
+    return Response(body, mimetype="application/json")
+
+
+@app.route("/tables/<table>/rows/<doc_id>", methods=["PUT"])
+def update_document_api(table: str, doc_id: str) -> Any:
+    if not session.get("user_id"):
+        return {"error": "login required"}, 401
+    if not is_valid_identifier(table):
+        return {"error": "invalid collection name"}, 400
+    if not ObjectId.is_valid(doc_id):
+        return {"error": "invalid document id"}, 400
+
+    updates = request.get_json(force=True, silent=True)
+    if not isinstance(updates, dict):
+        return {"error": "expected a JSON object"}, 400
+    updates.pop("_id", None)
+    if not updates:
+        return {"error": "nothing to update"}, 400
+
+    try:
+        document = update_and_fetch(table, ObjectId(doc_id), updates)
+        if not document:
+            return {"error": f"document {doc_id} not found"}, 404
+        invalidate_schema(table)
+        return _document_response(document)
+    except PyMongoError as exc:
+        return {"error": str(exc)}, 500
+
+
+@app.route("/tables/<table>/rows/<doc_id>", methods=["DELETE"])
+def delete_document_api(table: str, doc_id: str) -> Any:
+    if not session.get("user_id"):
+        return {"error": "login required"}, 401
+    if not is_valid_identifier(table):
+        return {"error": "invalid collection name"}, 400
+    if not ObjectId.is_valid(doc_id):
+        return {"error": "invalid document id"}, 400
+
+    try:
+        document = delete_and_fetch(table, ObjectId(doc_id))
+        if not document:
+            return {"error": f"document {doc_id} not found"}, 404
+        invalidate_schema(table)
+        return _document_response(document)
+    except PyMongoError as exc:
+        return {"error": str(exc)}, 500
+
+
 @app.route("/signup", methods=["GET", "POST"])
 def signup() -> Any:
     if request.method == "GET":
@@ -214,7 +388,7 @@ def signup() -> Any:
         return redirect(url_for("signup"))
 
     try:
-        password_hash = generate_password_hash(password)
+        password_hash = hash_password(password)
         user = insert_user(name, password_hash)
         session["user_id"] = user["_id"]
         session["user_name"] = user["name"]
@@ -242,15 +416,20 @@ def login() -> Any:
     try:
         user = find_user_by_name(name)
         if not user:
+            verify_password(_DUMMY_HASH, password)
             flash("Invalid credentials", "error")
             return redirect(url_for("login"))
 
-        if not check_password_hash(user["password"], password):
+        ok, needs_rehash = verify_password(user["password"], password)
+        if not ok:
             flash("Invalid credentials", "error")
             return redirect(url_for("login"))
+        if needs_rehash:
+            update_user_password(user["name"], hash_password(password))
 
         session["user_id"] = user["_id"]
         session["user_name"] = user["name"]
+        cache.delete(_home_cache_key())
         flash("Logged in successfully.", "success")
         return redirect(url_for("home"))
     except PyMongoError as exc:
@@ -260,6 +439,7 @@ def login() -> Any:
 
 @app.route("/logout", methods=["POST"]) 
 def logout() -> Any:
+    cache.delete(_home_cache_key())
     session.clear()
     flash("You have been logged out.", "info")
     return redirect(url_for("home"))
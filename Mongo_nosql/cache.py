@@ -0,0 +1,6 @@
+from flask_caching import Cache
+
+
+# Kept out of app.py so db.py can memoize the collection list and sampled
+# field names without a circular import; init_app() happens in app.py.
+cache = Cache()
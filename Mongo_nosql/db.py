@@ -2,11 +2,14 @@ import os
 import re
 from typing import Any, Dict, List, Optional, Sequence
 
+from bson import ObjectId
 from dotenv import load_dotenv
-from pymongo import MongoClient
+from pymongo import ASCENDING, IndexModel, MongoClient, ReturnDocument
 from pymongo.database import Database
 from pymongo.collection import Collection
 
+from cache import cache
+
 
 # Load environment variables from a local .env file if present.
 load_dotenv()
@@ -30,122 +33,216 @@ def get_db_config() -> Dict[str, Any]:
     }
 
 
-def get_database() -> Database:
-    """Return a MongoDB database connection."""
-    config = get_db_config()
-    
-    # Build connection string
+def _build_connection_string(config: Dict[str, Any]) -> str:
+    """Build a MongoDB URI from the collected settings."""
     if config["username"] and config["password"]:
-        connection_string = f"mongodb://{config['username']}:{config['password']}@{config['host']}:{config['port']}/"
-    else:
-        connection_string = f"mongodb://{config['host']}:{config['port']}/"
-    
-    client = MongoClient(connection_string)
-    return client[config["database"]]
+        return f"mongodb://{config['username']}:{config['password']}@{config['host']}:{config['port']}/"
+    return f"mongodb://{config['host']}:{config['port']}/"
+
+
+def _create_client() -> MongoClient:
+    """Create the shared client; sockets are opened lazily on first use."""
+    return MongoClient(
+        _build_connection_string(_CONFIG),
+        maxPoolSize=50,
+        minPoolSize=5,
+        serverSelectionTimeoutMS=2000,
+        connect=False,
+    )
 
 
-def ensure_users_collection() -> None:
-    """Create users collection with unique index on name."""
-    db = get_database()
-    if "users" not in db.list_collection_names():
-        db.create_collection("users")
-    db.users.create_index("name", unique=True)
+def _reset_client_after_fork() -> None:
+    """Give forked workers (e.g. gunicorn prefork) their own client and pool."""
+    global _CLIENT, _DB
+    _CLIENT = _create_client()
+    _DB = _CLIENT[_DB_NAME]
+
+
+# Settings are read once at import; MongoClient is thread-safe and pools its
+# own sockets, so every request shares this single instance.
+_CONFIG: Dict[str, Any] = get_db_config()
+_DB_NAME: str = _CONFIG["database"]
+_CLIENT: MongoClient = _create_client()
+_DB: Database = _CLIENT[_DB_NAME]
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_client_after_fork)
+
+
+def get_database() -> Database:
+    """Return the MongoDB database handle backed by the shared client."""
+    return _DB
 
 
-_IDENT_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+_INDEXES_READY = False
+
+
+def ensure_users_collection() -> None:
+    """Create users collection with unique index on name.
+
+    Creating the index also creates the collection, and the work is done only
+    once per process however many times this is called.
+    """
+    global _INDEXES_READY
+    if _INDEXES_READY:
+        return
+    # Keep the default "name_1" index name so existing databases match.
+    _DB.users.create_indexes([IndexModel([("name", ASCENDING)], unique=True)])
+    _INDEXES_READY = True
 
 
 def is_valid_identifier(name: str) -> bool:
-    return bool(_IDENT_RE.match(name))
+    # ASCII identifiers are exactly [A-Za-z_][A-Za-z0-9_]*; both checks run in C.
+    return name.isascii() and name.isidentifier()
+
+
+_SYSTEM_COLLECTION_RE = re.compile(r"^system\.")
 
 
+@cache.memoize(timeout=30)
 def list_user_collections() -> List[str]:
     """Return all collections in the database, excluding system collections."""
-    db = get_database()
-    collections = db.list_collection_names()
-    # Filter out system collections
-    user_collections = [c for c in collections if not c.startswith("system.")]
-    return sorted(user_collections)
+    # Filter out system collections on the server and return names only
+    cursor = _DB.list_collections(filter={"name": {"$not": _SYSTEM_COLLECTION_RE}}, nameOnly=True)
+    return sorted(c["name"] for c in cursor)
 
 
+def invalidate_collections() -> None:
+    """Drop the cached collection list after a collection is created."""
+    cache.delete_memoized(list_user_collections)
+
+
+@cache.memoize(timeout=60)
 def get_collection_fields(collection_name: str) -> List[str]:
-    """Return field names from a sample document in the collection."""
+    """Return top-level field names from a sample document in the collection."""
     if not is_valid_identifier(collection_name):
         raise ValueError("invalid collection name")
     
-    db = get_database()
-    collection = db[collection_name]
-    
-    # Get a sample document to determine fields
-    sample = collection.find_one()
-    if sample:
-        return list(sample.keys())
+    # Ask the server for the key names of one sampled document only, so large
+    # field values never cross the wire.
+    pipeline = [
+        {"$sample": {"size": 1}},
+        {"$project": {"_id": 0, "fields": {"$map": {"input": {"$objectToArray": "$$ROOT"}, "in": "$$this.k"}}}},
+    ]
+    for sample in _DB[collection_name].aggregate(pipeline):
+        return sample["fields"]
     return []
 
 
-def fetch_collection_documents(collection_name: str, limit: int = 200) -> List[Dict[str, Any]]:
-    """Fetch documents from a collection."""
+def invalidate_schema(collection_name: str) -> None:
+    """Drop cached field metadata after the collection's shape may have changed."""
+    cache.delete_memoized(get_collection_fields, collection_name)
+
+
+def fetch_collection_documents(
+    collection_name: str,
+    limit: int = 200,
+    projection: Optional[Sequence[str]] = None,
+) -> List[Dict[str, Any]]:
+    """Fetch documents from a collection.
+
+    When ``projection`` is given only those fields (plus ``_id``) are sent
+    back by the server; by default whole documents are returned, which the
+    table view needs for its JSON editor.
+    """
     if not is_valid_identifier(collection_name):
         raise ValueError("invalid collection name")
     
-    db = get_database()
-    collection = db[collection_name]
-    documents = list(collection.find().limit(limit))
-    
-    # Convert ObjectId to string for JSON serialization
+    pipeline: List[Dict[str, Any]] = [{"$limit": limit}]
+    if projection:
+        pipeline.append({"$project": {field: 1 for field in projection}})
+    # Convert ObjectId to string for JSON serialization on the server, and
+    # fetch the whole page in a single batch. An _id the server cannot
+    # convert (e.g. an embedded document) is left as is and stringified here.
+    pipeline.append(
+        {"$addFields": {"_id": {"$convert": {"input": "$_id", "to": "string", "onError": "$_id"}}}}
+    )
+    documents = list(_DB[collection_name].aggregate(pipeline, batchSize=limit))
     for doc in documents:
-        if "_id" in doc:
-            doc["_id"] = str(doc["_id"])
-    
+        if not isinstance(doc.get("_id"), str):
+            doc["_id"] = str(doc.get("_id"))
     return documents
 
 
 def insert_user(name: str, password_hash: str) -> Dict[str, Any]:
     """Insert a new user and return the created document."""
-    db = get_database()
-    result = db.users.insert_one({"name": name, "password": password_hash})
+    result = _DB.users.insert_one({"name": name, "password": password_hash})
     return {"_id": str(result.inserted_id), "name": name}
 
 
 def find_user_by_name(name: str) -> Optional[Dict[str, Any]]:
     """Find a user by name."""
-    db = get_database()
-    user = db.users.find_one({"name": name})
+    user = _DB.users.find_one({"name": name})
     if user:
         user["_id"] = str(user["_id"])
     return user
 
 
+def update_user_password(name: str, password_hash: str) -> None:
+    """Replace the stored password hash for a user."""
+    _DB.users.update_one({"name": name}, {"$set": {"password": password_hash}})
+
+
 def insert_document(collection_name: str, document: Dict[str, Any]) -> str:
     """Insert a document into a collection and return the inserted ID."""
     if not is_valid_identifier(collection_name):
         raise ValueError("invalid collection name")
     
-    db = get_database()
-    result = db[collection_name].insert_one(document)
+    result = _DB[collection_name].insert_one(document)
     return str(result.inserted_id)
 
 
-def update_document(collection_name: str, doc_id: str, updates: Dict[str, Any]) -> bool:
+def insert_documents(collection_name: str, documents: Sequence[Dict[str, Any]]) -> List[str]:
+    """Insert many documents in a single round trip and return their IDs."""
+    if not is_valid_identifier(collection_name):
+        raise ValueError("invalid collection name")
+    
+    result = _DB[collection_name].insert_many(list(documents), ordered=False)
+    return [str(inserted_id) for inserted_id in result.inserted_ids]
+
+
+def update_document(collection_name: str, doc_id: ObjectId, updates: Dict[str, Any]) -> bool:
     """Update a document by ID. Returns True if updated."""
     if not is_valid_identifier(collection_name):
         raise ValueError("invalid collection name")
     
-    from bson import ObjectId
-    db = get_database()
-    result = db[collection_name].update_one(
-        {"_id": ObjectId(doc_id)},
+    result = _DB[collection_name].update_one(
+        {"_id": doc_id},
         {"$set": updates}
     )
     return result.modified_count > 0
 
 
-def delete_document(collection_name: str, doc_id: str) -> bool:
+def delete_document(collection_name: str, doc_id: ObjectId) -> bool:
     """Delete a document by ID. Returns True if deleted."""
     if not is_valid_identifier(collection_name):
         raise ValueError("invalid collection name")
     
-    from bson import ObjectId
-    db = get_database()
-    result = db[collection_name].delete_one({"_id": ObjectId(doc_id)})
+    result = _DB[collection_name].delete_one({"_id": doc_id})
     return result.deleted_count > 0
+
+
+def update_and_fetch(collection_name: str, doc_id: ObjectId, updates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Update a document by ID and return it as stored afterwards, or None."""
+    if not is_valid_identifier(collection_name):
+        raise ValueError("invalid collection name")
+    
+    document = _DB[collection_name].find_one_and_update(
+        {"_id": doc_id},
+        {"$set": updates},
+        return_document=ReturnDocument.AFTER,
+    )
+    if document:
+        document["_id"] = str(document["_id"])
+    return document
+
+
+def delete_and_fetch(collection_name: str, doc_id: ObjectId) -> Optional[Dict[str, Any]]:
+    """Delete a document by ID and return the removed document, or None."""
+    if not is_valid_identifier(collection_name):
+        raise ValueError("invalid collection name")
+    
+    document = _DB[collection_name].find_one_and_delete({"_id": doc_id})
+    if document:
+        document["_id"] = str(document["_id"])
+    return document
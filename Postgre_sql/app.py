@@ -1,25 +1,107 @@
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple
 import os
+import threading
 
 from flask import Flask, jsonify, request, render_template, redirect, url_for, session, flash
-from psycopg import Error as PsycopgError
-from werkzeug.security import generate_password_hash, check_password_hash
+from flask.json.provider import DefaultJSONProvider
+import orjson
+from psycopg import Error as PsycopgError, sql
+from werkzeug.security import check_password_hash
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
 from dotenv import load_dotenv
 
+from cache import cache
 from db import (
     ensure_contacts_table,
-    ensure_users_table,
+    ensure_schema,
     execute,
+    insert_rows,
+    insert_statement,
+    update_statement,
+    delete_statement,
     list_user_tables,
-    get_table_columns,
-    fetch_table_rows,
+    describe_table,
+    inspect_table,
     is_valid_identifier,
-    get_primary_key_columns,
+    invalidate_schema,
 )
 
+# The dumps() arguments orjson can reproduce: none, Flask's compact response
+# separators, or its debug-mode pretty printing.
+_ORJSON_DUMPS_ARGS = ({}, {"separators": (",", ":")}, {"indent": 2})
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider backed by orjson.
+
+    Types orjson does not handle natively (and datetimes, to keep Flask's
+    HTTP date format) are passed to Flask's default serializer. Output is
+    UTF-8 rather than ASCII-escaped; calls with arguments orjson has no
+    equivalent for (``ensure_ascii``, ``object_hook``, other indents...) fall
+    back to the standard library.
+    """
+
+    ensure_ascii = False
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if self.ensure_ascii or kwargs not in _ORJSON_DUMPS_ARGS:
+            return super().dumps(obj, **kwargs)
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get("indent"):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option).decode()
+
+    def loads(self, s: Any, **kwargs: Any) -> Any:
+        # The session serializer passes an object_hook to rebuild tagged
+        # values (flash tuples, bytes, ...); orjson cannot apply one.
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 load_dotenv()
 app.secret_key = os.getenv("FLASK_SECRET_KEY", "dev-secret-change-me")
+cache.init_app(
+    app,
+    config={
+        "CACHE_TYPE": os.getenv("CACHE_TYPE", "SimpleCache"),
+        "CACHE_DEFAULT_TIMEOUT": int(os.getenv("CACHE_DEFAULT_TIMEOUT", "60")),
+    },
+)
+
+
+# Password hashing mirrors the Mongo app: the same Argon2id parameters, a
+# dummy hash so logins for unknown users take as long as wrong passwords,
+# and at most one concurrent hash per core.
+_hasher = PasswordHasher(time_cost=3, memory_cost=46 * 1024, parallelism=1)
+_DUMMY_HASH = _hasher.hash("dummy")
+_HASH_SLOTS = threading.BoundedSemaphore(os.cpu_count() or 1)
+
+
+def hash_password(password: str) -> str:
+    with _HASH_SLOTS:
+        return _hasher.hash(password)
+
+
+def verify_password(stored_hash: str, password: str) -> Tuple[bool, bool]:
+    """Check a password against its stored hash.
+
+    Returns ``(ok, needs_rehash)``. Hashes created by Werkzeug before the
+    switch to Argon2 are still accepted and flagged for an upgrade.
+    """
+    with _HASH_SLOTS:
+        if not stored_hash.startswith("$argon2"):
+            return check_password_hash(stored_hash, password), True
+        try:
+            _hasher.verify(stored_hash, password)
+        except (VerificationError, InvalidHashError):
+            return False, False
+    return True, _hasher.check_needs_rehash(stored_hash)
 
 
 @app.route("/health", methods=["GET"])
@@ -36,7 +118,23 @@ def init_table() -> Any:
         return {"error": str(exc)}, 500
 
 
+def _home_cache_key(*args: Any, **kwargs: Any) -> str:
+    generation = cache.get("home:generation") or 0
+    return f"home:{generation}:{session.get('user_id', 'anon')}"
+
+
+def _invalidate_home() -> None:
+    """Expire every user's cached dashboard after the table list changes."""
+    cache.inc("home:generation")
+
+
 @app.route("/", methods=["GET"])
+@cache.cached(
+    timeout=15,
+    make_cache_key=_home_cache_key,
+    # Pending flash messages are rendered into the page, so never cache them.
+    unless=lambda: "_flashes" in session,
+)
 def home() -> Any:
     user_name = session.get("user_name")
     tables = []
@@ -86,12 +184,15 @@ def create_table() -> Any:
             if not pg_type:
                 flash(f"Unsupported type '{typ}' for column {name}", "error")
                 return redirect(url_for("home"))
-            col_defs.append(f"{name} {pg_type}")
+            col_defs.append(sql.SQL("{} {}").format(sql.Identifier(name), sql.SQL(pg_type)))
 
-    # Always include id serial PK
-    columns_sql = ", ".join(["id SERIAL PRIMARY KEY"] + col_defs) if col_defs else "id SERIAL PRIMARY KEY"
+    # Always include id serial PK. Names are quoted like every other query
+    # on the table, so the stored name keeps the casing given here.
+    columns_sql = sql.SQL(", ").join([sql.SQL("id SERIAL PRIMARY KEY"), *col_defs])
     try:
-        execute(f"CREATE TABLE IF NOT EXISTS {table_name} ({columns_sql});")
+        execute(sql.SQL("CREATE TABLE IF NOT EXISTS {} ({});").format(sql.Identifier(table_name), columns_sql))
+        invalidate_schema(table_name)
+        _invalidate_home()
         flash(f"Table '{table_name}' is ready.", "success")
     except PsycopgError as exc:
         flash(f"Create table failed: {exc}", "error")
@@ -103,9 +204,7 @@ def view_table(table: str) -> Any:
     if not is_valid_identifier(table):
         return {"error": "invalid table name"}, 400
     try:
-        cols = get_table_columns(table)
-        rows = fetch_table_rows(table, limit=200)
-        pk_cols = get_primary_key_columns(table)
+        cols, rows, pk_cols = inspect_table(table, limit=200, ordered=True)
         pk_col = pk_cols[0] if pk_cols else None
         return render_template("table_view.html", table=table, columns=cols, rows=rows, pk_col=pk_col)
     except PsycopgError as exc:
@@ -121,8 +220,9 @@ def insert_row(table: str) -> Any:
     if not is_valid_identifier(table):
         flash("Invalid table name", "error")
         return redirect(url_for("home"))
-    cols_meta = get_table_columns(table)
-    pk_cols = get_primary_key_columns(table)
+    description = describe_table(table)
+    cols_meta = description["columns"]
+    pk_cols = description["primary_key"]
     # Build columns and params excluding PK
     insert_cols = []
     values = []
@@ -135,19 +235,37 @@ def insert_row(table: str) -> Any:
     if not insert_cols:
         flash("No insertable columns", "error")
         return redirect(url_for("view_table", table=table))
-    placeholders = ", ".join(["%s"] * len(insert_cols))
-    cols_sql = ", ".join(insert_cols)
     try:
-        execute(
-            f"INSERT INTO {table} ({cols_sql}) VALUES ({placeholders});",
-            values,
-        )
+        execute(insert_statement(table, tuple(insert_cols)), values, prepare=True)
         flash("Row inserted.", "success")
     except PsycopgError as exc:
         flash(f"Insert failed: {exc}", "error")
     return redirect(url_for("view_table", table=table))
 
 
+@app.route("/tables/<table>/rows/bulk", methods=["POST"])
+def bulk_insert_rows(table: str) -> Any:
+    if not session.get("user_id"):
+        return {"error": "login required"}, 401
+    if not is_valid_identifier(table):
+        return {"error": "invalid table name"}, 400
+
+    payload = request.get_json(force=True, silent=True)
+    if not payload or not isinstance(payload, list) or not all(isinstance(r, dict) for r in payload):
+        return {"error": "expected a non-empty JSON array of objects"}, 400
+
+    try:
+        description = describe_table(table)
+        pk_cols = description["primary_key"]
+        insert_cols = [c["column_name"] for c in description["columns"] if c["column_name"] not in pk_cols]
+        if not insert_cols:
+            return {"error": "no insertable columns"}, 400
+        count = insert_rows(table, insert_cols, [[r.get(name) for name in insert_cols] for r in payload])
+        return {"inserted": count}, 201
+    except PsycopgError as exc:
+        return {"error": str(exc)}, 500
+
+
 @app.route("/tables/<table>/rows/update", methods=["POST"])
 def update_row(table: str) -> Any:
     if not session.get("user_id"):
@@ -156,7 +274,8 @@ def update_row(table: str) -> Any:
     if not is_valid_identifier(table):
         flash("Invalid table name", "error")
         return redirect(url_for("home"))
-    pk_cols = get_primary_key_columns(table)
+    description = describe_table(table)
+    pk_cols = description["primary_key"]
     if not pk_cols:
         flash("Table has no primary key; cannot update", "error")
         return redirect(url_for("view_table", table=table))
@@ -167,22 +286,22 @@ def update_row(table: str) -> Any:
         flash("Primary key value missing", "error")
         return redirect(url_for("view_table", table=table))
     
-    cols_meta = get_table_columns(table)
-    sets = []
+    cols_meta = description["columns"]
+    set_cols = []
     params = []
     for c in cols_meta:
         name = c["column_name"]
         if name in pk_cols:
             continue
         if name in request.form:
-            sets.append(f"{name} = %s")
+            set_cols.append(name)
             params.append(request.form.get(name))
-    if not sets:
+    if not set_cols:
         flash("Nothing to update", "info")
         return redirect(url_for("view_table", table=table))
     params.append(pk_value)
     try:
-        execute(f"UPDATE {table} SET {', '.join(sets)} WHERE {pk_col} = %s;", params)
+        execute(update_statement(table, tuple(set_cols), pk_col), params, prepare=True)
         flash("Row updated.", "success")
     except PsycopgError as exc:
         flash(f"Update failed: {exc}", "error")
@@ -197,7 +316,7 @@ def delete_row(table: str) -> Any:
     if not is_valid_identifier(table):
         flash("Invalid table name", "error")
         return redirect(url_for("home"))
-    pk_cols = get_primary_key_columns(table)
+    pk_cols = describe_table(table)["primary_key"]
     if not pk_cols:
         flash("Table has no primary key; cannot delete", "error")
         return redirect(url_for("view_table", table=table))
@@ -209,7 +328,7 @@ def delete_row(table: str) -> Any:
         return redirect(url_for("view_table", table=table))
     
     try:
-        execute(f"DELETE FROM {table} WHERE {pk_col} = %s;", [pk_value])
+        execute(delete_statement(table, pk_col), [pk_value], prepare=True)
         flash("Row deleted.", "success")
     except PsycopgError as exc:
         flash(f"Delete failed: {exc}", "error")
@@ -228,7 +347,7 @@ def signup() -> Any:
         return redirect(url_for("signup"))
 
     try:
-        password_hash = generate_password_hash(password)
+        password_hash = hash_password(password)
         rows = execute(
             """
             INSERT INTO users (name, password)
@@ -270,16 +389,24 @@ def login() -> Any:
             fetch="one",
         )
         if not rows:
+            verify_password(_DUMMY_HASH, password)
             flash("Invalid credentials", "error")
             return redirect(url_for("login"))
 
         user = rows[0]
-        if not check_password_hash(user["password"], password):
+        ok, needs_rehash = verify_password(user["password"], password)
+        if not ok:
             flash("Invalid credentials", "error")
             return redirect(url_for("login"))
+        if needs_rehash:
+            execute(
+                "UPDATE users SET password = %s WHERE id = %s;",
+                [hash_password(password), user["id"]],
+            )
 
         session["user_id"] = user["id"]
         session["user_name"] = user["name"]
+        cache.delete(_home_cache_key())
         flash("Logged in successfully.", "success")
         return redirect(url_for("home"))
     except PsycopgError as exc:
@@ -289,6 +416,7 @@ def login() -> Any:
 
 @app.route("/logout", methods=["POST"]) 
 def logout() -> Any:
+    cache.delete(_home_cache_key())
     session.clear()
     flash("You have been logged out.", "info")
     return redirect(url_for("home"))
@@ -376,7 +504,6 @@ def delete_contact(contact_id: int) -> Any:
 
 
 if __name__ == "__main__":
-    # Ensure table exists before serving traffic.
-    ensure_contacts_table()
-    ensure_users_table()
+    # Ensure tables exist before serving traffic.
+    ensure_schema()
     app.run(host="0.0.0.0", port=5000, debug=True)
@@ -0,0 +1,6 @@
+from flask_caching import Cache
+
+
+# Bound to the app in app.py. db.py memoizes the table introspection helpers
+# on it, and app.py caches the rendered home page.
+cache = Cache()
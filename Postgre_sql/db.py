@@ -1,16 +1,37 @@
+import asyncio
+import atexit
 import os
-from typing import Any, Dict, Iterable, Optional, Sequence
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from functools import lru_cache, wraps
+from uuid import uuid4
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Final, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
 
 from dotenv import load_dotenv
-import psycopg
-from psycopg.rows import dict_row
-import re
+from flask import has_app_context
+from psycopg import AsyncConnection, Connection, Cursor, sql
+from psycopg.abc import Query
+from psycopg.conninfo import make_conninfo
+from psycopg.rows import RowFactory, dict_row, scalar_row
+from psycopg_pool import AsyncConnectionPool, ConnectionPool
+
+from cache import cache
 
 
 # Load environment variables from a local .env file if present.
 load_dotenv()
 
 
+# Bulk inserts above this many rows are streamed with COPY instead of INSERT.
+COPY_THRESHOLD = 1000
+
+# Row fetches asking for more than this many rows are read with binary COPY.
+COPY_FETCH_THRESHOLD = 10_000
+
+
 DEFAULT_DB_CONFIG: Dict[str, Any] = {
     "host": "localhost",
     "port": 5432,
@@ -20,133 +41,743 @@ DEFAULT_DB_CONFIG: Dict[str, Any] = {
 }
 
 
-def get_db_config() -> Dict[str, Any]:
-    """Collect connection settings from environment variables with sane defaults."""
-    return {
+@lru_cache(maxsize=1)
+def get_db_config() -> Mapping[str, Any]:
+    """Collect connection settings from environment variables with sane defaults.
+
+    The environment is read once; the result is shared and read-only.
+    """
+    return MappingProxyType({
         "host": os.getenv("PGHOST", DEFAULT_DB_CONFIG["host"]),
         "port": int(os.getenv("PGPORT", DEFAULT_DB_CONFIG["port"])),
         "user": os.getenv("PGUSER", DEFAULT_DB_CONFIG["user"]),
         "password": os.getenv("PGPASSWORD", DEFAULT_DB_CONFIG["password"]),
         "dbname": os.getenv("PGDATABASE", DEFAULT_DB_CONFIG["dbname"]),
-    }
+    })
+
+
+@lru_cache(maxsize=1)
+def _conninfo() -> str:
+    return make_conninfo(**get_db_config())
+
+
+def reset_config() -> None:
+    """Forget the cached settings so the environment is read again.
+
+    Only affects connections opened afterwards; an already open pool keeps
+    the settings it was created with.
+    """
+    get_db_config.cache_clear()
+    _conninfo.cache_clear()
+
+
+# Session settings applied once per physical connection by the pools'
+# ``configure`` hook. The timeouts cap how long a runaway query or an
+# abandoned transaction can hold a worker and its connection.
+_SESSION_SETTINGS_SQL: Final[bytes] = b"""
+    SELECT set_config('statement_timeout', %s, false),
+           set_config('idle_in_transaction_session_timeout', %s, false),
+           set_config('client_encoding', 'UTF8', false),
+           set_config('application_name', 'dwrangling', false);
+"""
+
+
+# Lifts both timeouts for the current transaction only. Used by the lazy
+# row iterators and bulk COPY, whose duration depends on the caller or the
+# batch size rather than on the query.
+_LIFT_TIMEOUTS_SQL: Final[bytes] = b"""
+    SELECT set_config('statement_timeout', '0', true),
+           set_config('idle_in_transaction_session_timeout', '0', true);
+"""
+
+
+def _session_settings() -> Tuple[str, str]:
+    return (
+        os.getenv("PG_STATEMENT_TIMEOUT", "5s"),
+        os.getenv("PG_IDLE_IN_TRANSACTION_TIMEOUT", "10s"),
+    )
+
+
+def _configure(conn: Connection[Any]) -> None:
+    conn.execute(_SESSION_SETTINGS_SQL, _session_settings())
+
+
+async def _configure_async(conn: AsyncConnection[Any]) -> None:
+    await conn.execute(_SESSION_SETTINGS_SQL, _session_settings())
+
+
+_POOL: Optional[ConnectionPool] = None
+_POOL_LOCK = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """Return the shared connection pool, opening it on first use.
+
+    The pool is created lazily so that the Flask reloader and pre-forking
+    servers open their sockets in the process that actually serves requests.
+    """
+    global _POOL
+    if _POOL is None:
+        with _POOL_LOCK:
+            if _POOL is None:
+                _POOL = ConnectionPool(
+                    conninfo=_conninfo(),
+                    min_size=int(os.getenv("PG_POOL_MIN_SIZE", "2")),
+                    max_size=int(os.getenv("PG_POOL_MAX_SIZE", "10")),
+                    kwargs={"autocommit": True, "row_factory": dict_row},
+                    configure=_configure,
+                    open=True,
+                )
+                atexit.register(_POOL.close)
+    return _POOL
+
+
+# psycopg's async pool is bound to the event loop that opened it, so each
+# loop gets its own; entries go away with their loop.
+_APOOLS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Tuple[AsyncConnectionPool, asyncio.Lock]]" = (
+    weakref.WeakKeyDictionary()
+)
+_APOOLS_LOCK = threading.Lock()
+
+
+async def get_async_pool() -> AsyncConnectionPool:
+    """Return the running event loop's connection pool, opening it on first await.
+
+    Await :func:`close_async_pool` before the loop ends (e.g. at the end of
+    the coroutine given to ``asyncio.run``) to release its connections.
+    """
+    loop = asyncio.get_running_loop()
+    with _APOOLS_LOCK:
+        entry = _APOOLS.get(loop)
+        if entry is None:
+            pool = AsyncConnectionPool(
+                conninfo=_conninfo(),
+                min_size=int(os.getenv("PG_POOL_MIN_SIZE", "2")),
+                max_size=int(os.getenv("PG_POOL_MAX_SIZE", "10")),
+                kwargs={"autocommit": True, "row_factory": dict_row},
+                configure=_configure_async,
+                open=False,
+            )
+            entry = _APOOLS[loop] = (pool, asyncio.Lock())
+    pool, opening = entry
+    if pool.closed:
+        async with opening:
+            if pool.closed:
+                await pool.open()
+    return pool
+
+
+async def close_async_pool() -> None:
+    """Close the running event loop's pool, if it has one."""
+    with _APOOLS_LOCK:
+        entry = _APOOLS.pop(asyncio.get_running_loop(), None)
+    if entry is not None:
+        await entry[0].close()
 
 
 def get_connection():
-    """Return a psycopg connection using current environment; autocommit enabled."""
-    config = get_db_config()
-    conn = psycopg.connect(**config)
-    conn.autocommit = True
-    return conn
+    """Check a connection out of the shared pool; autocommit enabled.
+
+    Use as a context manager: the connection goes back to the pool on exit.
+    """
+    return get_pool().connection()
+
+
+# Fixed statements are kept as module-level bytes: psycopg sends bytes as-is
+# (no per-call encode) and the identical buffer keys its prepared statements.
+_CREATE_CONTACTS_SQL: Final[bytes] = b"""
+CREATE TABLE IF NOT EXISTS contacts (
+    id SERIAL PRIMARY KEY,
+    name TEXT NOT NULL,
+    email TEXT NOT NULL UNIQUE
+);
+"""
+
+# The column is named `password` as requested, but values should be hashed
+# (not plain text).
+_CREATE_USERS_SQL: Final[bytes] = b"""
+CREATE TABLE IF NOT EXISTS users (
+    id SERIAL PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    password TEXT NOT NULL
+);
+"""
+
+
+_MISSING_TABLES_SQL: Final[bytes] = b"""
+SELECT to_regclass('public.contacts') IS NULL AS contacts,
+       to_regclass('public.users') IS NULL AS users;
+"""
+
+
+def ensure_schema() -> None:
+    """Create the contacts and users tables if they do not already exist.
+
+    A catalog probe runs first so the usual warm start issues no DDL (and
+    takes no table locks); missing tables are then created on the same
+    connection inside one transaction.
+    """
+    with with_cursor() as cur:
+        missing = _run(cur, _MISSING_TABLES_SQL, fetch="one")[0]
+        if not (missing["contacts"] or missing["users"]):
+            return
+        with cur.connection.transaction():
+            if missing["contacts"]:
+                cur.execute(_CREATE_CONTACTS_SQL)
+            if missing["users"]:
+                cur.execute(_CREATE_USERS_SQL)
 
 
 def ensure_contacts_table() -> None:
     """Create a simple contacts table if it does not already exist."""
-    create_sql = """
-    CREATE TABLE IF NOT EXISTS contacts (
-        id SERIAL PRIMARY KEY,
-        name TEXT NOT NULL,
-        email TEXT NOT NULL UNIQUE
-    );
-    """
-    with get_connection() as conn, conn.cursor() as cur:
-        cur.execute(create_sql)
+    ensure_schema()
 
 
 def ensure_users_table() -> None:
     """Create a simple users table if it does not already exist.
 
-    The table stores a username and a password hash. The column is named
-    `password` as requested, but values should be hashed (not plain text).
+    The table stores a username and a password hash.
     """
-    create_sql = """
-    CREATE TABLE IF NOT EXISTS users (
-        id SERIAL PRIMARY KEY,
-        name TEXT NOT NULL UNIQUE,
-        password TEXT NOT NULL
-    );
+    ensure_schema()
+
+
+def is_valid_identifier(name: str) -> bool:
+    # ASCII identifiers are exactly [A-Za-z_][A-Za-z0-9_]*; both checks run in C.
+    return name.isascii() and name.isidentifier()
+
+
+# A schema version token for the public schema, built from two catalogs:
+# - pg_class rows change on creating, dropping or altering a table or index
+#   (the row's xmin is bumped; a drop changes the count).
+# - pg_attribute rows change on column-only DDL such as RENAME COLUMN or
+#   SET/DROP NOT NULL.
+# VACUUM and ANALYZE update pg_class in place, so they leave the token alone.
+_SCHEMA_VERSION_SQL: Final[bytes] = b"""
+    SELECT count(*) AS relations,
+           COALESCE(max(c.xmin::text::bigint), 0) AS xmin,
+           (SELECT COALESCE(max(a.xmin::text::bigint), 0)
+              FROM pg_catalog.pg_attribute a
+              JOIN pg_catalog.pg_class ac ON ac.oid = a.attrelid
+             WHERE ac.relnamespace = 'public'::regnamespace) AS attribute_xmin
+      FROM pg_catalog.pg_class c
+     WHERE c.relnamespace = 'public'::regnamespace;
+"""
+
+_SCHEMA_CHECK_INTERVAL = float(os.getenv("PG_SCHEMA_CHECK_INTERVAL", "5"))
+_SCHEMA_LOCK = threading.Lock()
+_schema_version: Optional[Tuple[int, int, int]] = None
+_schema_checked_at = float("-inf")
+_SCHEMA_CACHED: List[Callable[..., Any]] = []
+
+
+def _check_schema_version() -> None:
+    """Drop the memoized introspection results if the catalog has changed.
+
+    The version query runs at most once per ``PG_SCHEMA_CHECK_INTERVAL``
+    seconds per process, so DDL made by another worker or another client
+    is noticed without re-reading the catalog on every call.
     """
-    with get_connection() as conn, conn.cursor() as cur:
-        cur.execute(create_sql)
+    global _schema_version, _schema_checked_at
+    if time.monotonic() - _schema_checked_at < _SCHEMA_CHECK_INTERVAL:
+        return
+    with _SCHEMA_LOCK:
+        now = time.monotonic()
+        if now - _schema_checked_at < _SCHEMA_CHECK_INTERVAL:
+            return
+        rows = execute(_SCHEMA_VERSION_SQL, fetch="one", prepare=True)
+        # Only a successful check starts the interval; a failed one is
+        # retried on the next call.
+        _schema_checked_at = now
+        version = (rows[0]["relations"], rows[0]["xmin"], rows[0]["attribute_xmin"]) if rows else None
+        if version != _schema_version:
+            for fn in _SCHEMA_CACHED:
+                cache.delete_memoized(fn)
+            _schema_version = version
 
 
-_IDENT_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+def _uses_caller_cursor(f: Any, *args: Any, **kwargs: Any) -> bool:
+    # A caller-supplied cursor is not a cache key; run those calls uncached.
+    return kwargs.get("cur") is not None
 
 
-def is_valid_identifier(name: str) -> bool:
-    return bool(_IDENT_RE.match(name))
-
-
-def list_user_tables() -> Sequence[str]:
-    """Return user tables in public schema (excluding pg/internal schemas)."""
-    query = (
-        """
-        SELECT table_name
-          FROM information_schema.tables
-         WHERE table_schema = 'public'
-           AND table_type = 'BASE TABLE'
-         ORDER BY table_name;
-        """
-    )
-    rows = execute(query, fetch="all") or []
-    return [r["table_name"] for r in rows]  # type: ignore[index]
+def _schema_cached(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """Memoize an introspection helper behind the schema version check.
+
+    The cache is bound to the Flask app with ``init_app``, so outside an app
+    context (scripts, the asyncio helpers) the helper simply runs uncached.
+    """
+    memoized = cache.memoize(timeout=60, unless=_uses_caller_cursor)(fn)
+
+    @wraps(memoized)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        if not has_app_context():
+            return fn(*args, **kwargs)
+        if kwargs.get("cur") is None:
+            _check_schema_version()
+        return memoized(*args, **kwargs)
 
+    _SCHEMA_CACHED.append(memoized)
+    return wrapper
 
-def get_table_columns(table_name: str) -> Sequence[Dict[str, Any]]:
-    """Return column metadata for a table in public schema."""
+
+_LIST_TABLES_SQL: Final[bytes] = b"""
+    SELECT c.relname AS table_name
+      FROM pg_catalog.pg_class c
+      JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+     WHERE n.nspname = 'public'
+       AND c.relkind IN ('r', 'p')
+     ORDER BY c.relname;
+"""
+
+
+@_schema_cached
+def list_user_tables(*, cur: Optional[Cursor[Any]] = None) -> Sequence[str]:
+    """Return user tables in public schema (excluding pg/internal schemas).
+
+    Pass ``cur`` (from :func:`with_cursor`) to reuse an open connection.
+    """
+    return _execute_on(cur, _LIST_TABLES_SQL, fetch="all", prepare=True, row_factory=scalar_row) or []
+
+
+# Read pg_catalog directly rather than the information_schema views, which
+# wrap the same catalogs in many joins and privilege checks. Values keep the
+# information_schema shape (type name without modifiers, 'YES'/'NO').
+_TABLE_COLUMNS_SQL: Final[bytes] = b"""
+    SELECT a.attname AS column_name,
+           format_type(a.atttypid, NULL) AS data_type,
+           CASE WHEN a.attnotnull THEN 'NO' ELSE 'YES' END AS is_nullable
+      FROM pg_catalog.pg_attribute a
+      JOIN pg_catalog.pg_class c ON c.oid = a.attrelid
+      JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+     WHERE n.nspname = 'public' AND c.relname = %s
+       AND a.attnum > 0 AND NOT a.attisdropped
+     ORDER BY a.attnum;
+"""
+
+# indkey is unnested so pg_attribute is probed by (attrelid, attnum) and the
+# key columns come back in index order, not table order. The table is
+# matched on relname, like the other lookups, so the name is taken verbatim
+# instead of being case-folded as an unquoted ::regclass cast would.
+_PRIMARY_KEY_SQL: Final[bytes] = b"""
+    SELECT a.attname
+      FROM pg_catalog.pg_index i
+      JOIN pg_catalog.pg_class c ON c.oid = i.indrelid
+      JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+     CROSS JOIN LATERAL unnest(i.indkey) WITH ORDINALITY AS k(attnum, ord)
+      JOIN pg_catalog.pg_attribute a ON a.attrelid = i.indrelid
+         AND a.attnum = k.attnum
+     WHERE i.indisprimary
+       AND n.nspname = 'public' AND c.relname = %s
+     ORDER BY k.ord;
+"""
+
+
+# Columns and primary key of one table as a single JSON document, so callers
+# that need both pay one round trip and one catalog lookup of the table.
+_DESCRIBE_TABLE_SQL: Final[bytes] = b"""
+    SELECT jsonb_build_object(
+               'columns', COALESCE((
+                   SELECT jsonb_agg(jsonb_build_object(
+                              'column_name', a.attname,
+                              'data_type', format_type(a.atttypid, NULL),
+                              'is_nullable', CASE WHEN a.attnotnull THEN 'NO' ELSE 'YES' END
+                          ) ORDER BY a.attnum)
+                     FROM pg_catalog.pg_attribute a
+                    WHERE a.attrelid = c.oid AND a.attnum > 0 AND NOT a.attisdropped
+               ), '[]'::jsonb),
+               'primary_key', COALESCE((
+                   SELECT jsonb_agg(a.attname ORDER BY k.ord)
+                     FROM pg_catalog.pg_index i
+                    CROSS JOIN LATERAL unnest(i.indkey) WITH ORDINALITY AS k(attnum, ord)
+                     JOIN pg_catalog.pg_attribute a ON a.attrelid = i.indrelid
+                        AND a.attnum = k.attnum
+                    WHERE i.indrelid = c.oid AND i.indisprimary
+               ), '[]'::jsonb)
+           ) AS description
+      FROM pg_catalog.pg_class c
+      JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+     WHERE n.nspname = 'public' AND c.relname = %s;
+"""
+
+def _empty_description() -> Dict[str, Any]:
+    # A fresh value each time, so a caller mutating the lists cannot change
+    # what later lookups of unknown tables return.
+    return {"columns": [], "primary_key": []}
+
+
+@_schema_cached
+def describe_table(table_name: str) -> Dict[str, Any]:
+    """Return ``{"columns": [...], "primary_key": [...]}`` for a public table.
+
+    Column entries have the same keys as :func:`get_table_columns`. An
+    unknown table yields empty lists.
+    """
     if not is_valid_identifier(table_name):
         raise ValueError("invalid table name")
-    rows = execute(
-        """
-        SELECT column_name, data_type, is_nullable
-          FROM information_schema.columns
-         WHERE table_schema = 'public' AND table_name = %s
-         ORDER BY ordinal_position;
-        """,
-        [table_name],
-        fetch="all",
-    )
+    rows = execute(_DESCRIBE_TABLE_SQL, [table_name], fetch="one", prepare=True)
+    return rows[0]["description"] if rows else _empty_description()
+
+
+@_schema_cached
+def get_table_columns(table_name: str, *, cur: Optional[Cursor[Any]] = None) -> Sequence[Dict[str, Any]]:
+    """Return column metadata for a table in public schema.
+
+    Prefer :func:`describe_table` when the primary key is needed as well.
+    """
+    if not is_valid_identifier(table_name):
+        raise ValueError("invalid table name")
+    rows = _execute_on(cur, _TABLE_COLUMNS_SQL, [table_name], fetch="all", prepare=True)
     return rows or []
 
 
-def get_primary_key_columns(table_name: str) -> Sequence[str]:
-    """Return the primary key column(s) for a table."""
+@_schema_cached
+def get_primary_key_columns(table_name: str, *, cur: Optional[Cursor[Any]] = None) -> Sequence[str]:
+    """Return the primary key column(s) for a table.
+
+    Prefer :func:`describe_table` when the columns are needed as well.
+    """
     if not is_valid_identifier(table_name):
         raise ValueError("invalid table name")
-    rows = execute(
-        """
-        SELECT a.attname
-          FROM pg_index i
-          JOIN pg_attribute a ON a.attrelid = i.indrelid
-             AND a.attnum = ANY(i.indkey)
-         WHERE i.indisprimary
-           AND i.indrelid = %s::regclass
-         ORDER BY a.attnum;
-        """,
-        [table_name],
-        fetch="all",
+    return _execute_on(
+        cur, _PRIMARY_KEY_SQL, [table_name], fetch="all", prepare=True, row_factory=scalar_row
+    ) or []
+
+
+# Every public table with its columns in one catalog scan, instead of one
+# get_table_columns() round trip per table.
+_ALL_TABLE_SCHEMAS_SQL: Final[bytes] = b"""
+    SELECT c.relname AS table_name, COALESCE(cols.columns, '[]'::jsonb) AS columns
+      FROM pg_catalog.pg_class c
+      JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+      LEFT JOIN LATERAL (
+               SELECT jsonb_agg(jsonb_build_object(
+                          'column_name', a.attname,
+                          'data_type', format_type(a.atttypid, NULL),
+                          'is_nullable', CASE WHEN a.attnotnull THEN 'NO' ELSE 'YES' END
+                      ) ORDER BY a.attnum) AS columns
+                 FROM pg_catalog.pg_attribute a
+                WHERE a.attrelid = c.oid AND a.attnum > 0 AND NOT a.attisdropped
+           ) cols ON true
+     WHERE n.nspname = 'public'
+       AND c.relkind IN ('r', 'p')
+     ORDER BY c.relname;
+"""
+
+
+@_schema_cached
+def get_all_table_schemas() -> Dict[str, Sequence[Dict[str, Any]]]:
+    """Return ``{table_name: columns}`` for every user table in one query.
+
+    Column entries have the same keys as :func:`get_table_columns`.
+    """
+    rows = execute(_ALL_TABLE_SCHEMAS_SQL, fetch="all", prepare=True) or []
+    return {row["table_name"]: row["columns"] for row in rows}
+
+
+def invalidate_schema(table_name: str) -> None:
+    """Drop cached column/primary-key metadata after DDL on a table.
+
+    A no-op outside a Flask app context, where nothing is cached.
+    """
+    if not has_app_context():
+        return
+    cache.delete_memoized(list_user_tables)
+    cache.delete_memoized(get_table_columns, table_name)
+    cache.delete_memoized(get_primary_key_columns, table_name)
+    cache.delete_memoized(describe_table, table_name)
+    cache.delete_memoized(get_all_table_schemas)
+
+
+def _order_by(table_name: str, ordered: bool) -> Optional[Tuple[str, ...]]:
+    # ``None`` means no ORDER BY at all; an empty tuple falls back to column 1.
+    if not ordered:
+        return None
+    return tuple(get_primary_key_columns(table_name))
+
+
+def _order_clause(order_by: Optional[Tuple[str, ...]]) -> sql.Composable:
+    if order_by is None:
+        return sql.SQL("")
+    if not order_by:
+        return sql.SQL(" ORDER BY 1")
+    return sql.SQL(" ORDER BY {}").format(sql.SQL(", ").join(map(sql.Identifier, order_by)))
+
+
+@lru_cache(maxsize=256)
+def _select_rows_sql(table_name: str, order_by: Optional[Tuple[str, ...]] = None) -> sql.Composed:
+    return sql.SQL("SELECT * FROM {}{} LIMIT %s;").format(
+        sql.Identifier(table_name), _order_clause(order_by)
     )
-    return [r["attname"] for r in (rows or [])]  # type: ignore[index]
 
 
-def fetch_table_rows(table_name: str, limit: int = 100) -> Sequence[Dict[str, Any]]:
+def fetch_table_rows(
+    table_name: str, limit: int = 100, itersize: int = 1000, ordered: bool = False
+) -> Iterator[Dict[str, Any]]:
+    """Yield up to ``limit`` rows, streamed from a server-side cursor.
+
+    Rows are pulled ``itersize`` at a time, so peak memory stays bounded
+    however large ``limit`` is. The pooled connection is held until the
+    iterator is exhausted or closed, and the pool's statement and
+    idle-in-transaction timeouts are lifted for that time. The table name is
+    quoted by ``sql.Identifier``, so an unknown or odd name is rejected by
+    the server. Above ``COPY_FETCH_THRESHOLD`` rows the data is read with
+    binary COPY, which skips the per-row protocol messages of a regular
+    query.
+
+    Rows come back in no particular order unless ``ordered`` is set, in
+    which case they are sorted by the primary key (or the first column
+    when the table has none). Skipping the sort lets a preview stop after
+    ``limit`` rows instead of sorting the whole table. The primary key is
+    looked up with :func:`get_primary_key_columns` first, so with
+    ``ordered`` a name failing :func:`is_valid_identifier` raises
+    ``ValueError`` before any rows are queried.
+    """
+    order_by = _order_by(table_name, ordered)
+    if limit > COPY_FETCH_THRESHOLD:
+        return _copy_rows(table_name, limit, order_by)
+    return _stream_rows(_select_rows_sql(table_name, order_by), [limit], itersize)
+
+
+def _copy_rows(
+    table_name: str, limit: int, order_by: Optional[Tuple[str, ...]] = None
+) -> Iterator[Dict[str, Any]]:
+    table = sql.Identifier(table_name)
+    # The COPY statement stays open while the caller consumes rows, so it
+    # runs in a transaction with the pool's timeouts lifted.
+    with get_connection() as conn, conn.transaction(), conn.cursor() as cur:
+        cur.execute(_LIFT_TIMEOUTS_SQL)
+        # Binary COPY needs the column types up front; an empty select gives
+        # names and type OIDs without reading any rows.
+        cur.execute(sql.SQL("SELECT * FROM {} LIMIT 0").format(table))
+        names = [column.name for column in cur.description]
+        types = [column.type_code for column in cur.description]
+        query = sql.SQL("COPY (SELECT * FROM {}{} LIMIT {}) TO STDOUT (FORMAT BINARY)").format(
+            table, _order_clause(order_by), sql.Literal(limit)
+        )
+        with cur.copy(query) as copy:
+            copy.set_types(types)
+            for row in copy.rows():
+                yield dict(zip(names, row))
+
+
+def _stream_rows(query: Query, params: Sequence[Any], itersize: int) -> Iterator[Dict[str, Any]]:
+    # Named (server-side) cursors live inside a transaction; the pool hands
+    # out autocommit connections, so open one explicitly. The caller may
+    # pause between batches, so the pool's timeouts are lifted for it.
+    with get_connection() as conn, conn.transaction():
+        conn.execute(_LIFT_TIMEOUTS_SQL)
+        with conn.cursor(name=f"tbl_{uuid4().hex}") as cur:
+            cur.itersize = itersize
+            cur.execute(query, params)
+            yield from cur
+
+
+def inspect_table(
+    table_name: str, limit: int = 100, ordered: bool = False
+) -> Tuple[Sequence[Dict[str, Any]], Sequence[Dict[str, Any]], Sequence[str]]:
+    """Return ``(columns, rows, primary_key_columns)`` for a table.
+
+    Unordered, the description and the rows are fetched in one pipelined
+    round trip. ``ordered`` sorts the rows as in :func:`fetch_table_rows`;
+    the sort key needs the primary key first, so the description then
+    comes from :func:`describe_table` and only the rows query is sent when
+    it is cached.
+    """
     if not is_valid_identifier(table_name):
         raise ValueError("invalid table name")
-    query = f"SELECT * FROM {table_name} ORDER BY 1 LIMIT %s;"
-    rows = execute(query, [limit], fetch="all")
-    return rows or []
+    if ordered:
+        description = describe_table(table_name)
+        order_by = tuple(description["primary_key"])
+        rows = execute(_select_rows_sql(table_name, order_by), [limit], fetch="all", prepare=True) or []
+        return description["columns"], rows, description["primary_key"]
+    described, rows = execute_batch(
+        [
+            (_DESCRIBE_TABLE_SQL, [table_name]),
+            (_select_rows_sql(table_name), [limit]),
+        ]
+    )
+    description = described[0]["description"] if described else _empty_description()
+    return description["columns"], rows, description["primary_key"]
 
 
-def execute(  # type: ignore[override]
-    query: str,
+@contextmanager
+def with_cursor() -> Iterator[Cursor[Any]]:
+    """Check out one pooled connection and yield a dict-row cursor on it.
+
+    Lets a caller run several statements (e.g. via the ``cur=`` argument of
+    the introspection helpers) for the price of a single pool checkout.
+    """
+    with get_connection() as conn, conn.cursor() as cur:
+        yield cur
+
+
+def _run(
+    cur: Cursor[Any],
+    query: Query,
     params: Optional[Sequence[Any]] = None,
     fetch: Optional[str] = None,
-) -> Optional[Iterable[Dict[str, Any]]]:
-    """Execute a query and optionally fetch rows as dicts."""
-    with get_connection() as conn, conn.cursor(row_factory=dict_row) as cur:
-        cur.execute(query, params)
+    prepare: Optional[bool] = None,
+    row_factory: Optional[RowFactory[Any]] = None,
+) -> Optional[Iterable[Any]]:
+    """Execute on an already open cursor; see :func:`execute` for arguments."""
+    previous = cur.row_factory
+    if row_factory is not None:
+        cur.row_factory = row_factory
+    try:
+        cur.execute(query, params, prepare=prepare)
         if fetch == "one":
             row = cur.fetchone()
-            return [row] if row else []
+            return [row] if row is not None else []
         if fetch == "all":
             return cur.fetchall()
         return None
+    finally:
+        cur.row_factory = previous
+
+
+def execute(  # type: ignore[override]
+    query: Query,
+    params: Optional[Sequence[Any]] = None,
+    fetch: Optional[str] = None,
+    prepare: Optional[bool] = None,
+    row_factory: Optional[RowFactory[Any]] = None,
+) -> Optional[Iterable[Any]]:
+    """Execute a query and optionally fetch rows as dicts.
+
+    Pass ``prepare=True`` for statements that are run repeatedly so the
+    server keeps their plan instead of parsing them on every call. Rows are
+    dicts unless another ``row_factory`` (e.g. ``scalar_row``) is given.
+    """
+    with with_cursor() as cur:
+        return _run(cur, query, params, fetch, prepare, row_factory)
+
+
+def _execute_on(
+    cur: Optional[Cursor[Any]],
+    query: Query,
+    params: Optional[Sequence[Any]] = None,
+    **kwargs: Any,
+) -> Optional[Iterable[Any]]:
+    """Run on the caller's cursor when one is given, else on a fresh checkout."""
+    if cur is None:
+        return execute(query, params, **kwargs)
+    return _run(cur, query, params, **kwargs)
+
+
+async def execute_async(
+    query: Query,
+    params: Optional[Sequence[Any]] = None,
+    fetch: Optional[str] = None,
+    prepare: Optional[bool] = None,
+    row_factory: Optional[RowFactory[Any]] = None,
+) -> Optional[Iterable[Any]]:
+    """Async counterpart of :func:`execute` backed by the asyncio pool.
+
+    Concurrent calls each check out their own connection, so their network
+    waits overlap instead of queueing on one thread.
+    """
+    pool = await get_async_pool()
+    async with pool.connection() as conn, conn.cursor(row_factory=row_factory) as cur:
+        await cur.execute(query, params, prepare=prepare)
+        if fetch == "one":
+            row = await cur.fetchone()
+            return [row] if row is not None else []
+        if fetch == "all":
+            return await cur.fetchall()
+        return None
+
+
+async def gather_introspection(
+    table_name: str, limit: int = 100
+) -> Tuple[Sequence[Dict[str, Any]], Sequence[Dict[str, Any]], Sequence[str]]:
+    """Async :func:`inspect_table`: describe the table and fetch rows concurrently."""
+    if not is_valid_identifier(table_name):
+        raise ValueError("invalid table name")
+    described, rows = await asyncio.gather(
+        execute_async(_DESCRIBE_TABLE_SQL, [table_name], fetch="one", prepare=True),
+        execute_async(_select_rows_sql(table_name), [limit], fetch="all", prepare=True),
+    )
+    description = described[0]["description"] if described else _empty_description()
+    return description["columns"], rows or [], description["primary_key"]
+
+
+def execute_batch(
+    items: Sequence[Tuple[Query, Optional[Sequence[Any]]]],
+) -> List[List[Dict[str, Any]]]:
+    """Run several row-returning queries on one connection in pipeline mode.
+
+    All statements are sent before any result is read, so the batch costs a
+    single network round trip. Returns one list of rows per query, in order.
+    Batched queries are hot introspection reads, so they are prepared.
+    """
+    with get_connection() as conn, conn.pipeline():
+        cursors = []
+        for query, params in items:
+            cur = conn.cursor()
+            cur.execute(query, params, prepare=True)
+            cursors.append(cur)
+        results = []
+        for cur in cursors:
+            with cur:
+                results.append(cur.fetchall())
+    return results
+
+
+def execute_many(query: Query, params_seq: Iterable[Sequence[Any]]) -> None:
+    """Execute one statement for every parameter set inside a single transaction."""
+    with get_connection() as conn, conn.transaction(), conn.cursor() as cur:
+        cur.executemany(query, params_seq)
+
+
+def insert_rows(table_name: str, columns: Sequence[str], rows: Sequence[Sequence[Any]]) -> int:
+    """Insert many rows in one go and return how many were written.
+
+    Small batches use a pipelined executemany; large ones are streamed with
+    COPY, which avoids per-row statement overhead entirely. Column names are
+    quoted with ``sql.Identifier``, so any name from the catalog is accepted.
+    """
+    if not is_valid_identifier(table_name):
+        raise ValueError("invalid table name")
+    if len(rows) > COPY_THRESHOLD:
+        copy_sql = sql.SQL("COPY {} ({}) FROM STDIN").format(
+            sql.Identifier(table_name),
+            sql.SQL(", ").join(map(sql.Identifier, columns)),
+        )
+        with get_connection() as conn, conn.transaction(), conn.cursor() as cur:
+            cur.execute(_LIFT_TIMEOUTS_SQL)
+            with cur.copy(copy_sql) as copy:
+                for row in rows:
+                    copy.write_row(row)
+    else:
+        execute_many(insert_statement(table_name, tuple(columns)), rows)
+    return len(rows)
+
+
+# Row-level statements are composed once per table/column set and reused, so
+# hot handlers neither rebuild the SQL nor change the text psycopg prepares.
+
+@lru_cache(maxsize=256)
+def insert_statement(table_name: str, columns: Tuple[str, ...]) -> sql.Composed:
+    return sql.SQL("INSERT INTO {} ({}) VALUES ({});").format(
+        sql.Identifier(table_name),
+        sql.SQL(", ").join(map(sql.Identifier, columns)),
+        sql.SQL(", ").join(sql.Placeholder() * len(columns)),
+    )
+
+
+@lru_cache(maxsize=256)
+def update_statement(table_name: str, columns: Tuple[str, ...], pk_col: str) -> sql.Composed:
+    return sql.SQL("UPDATE {} SET {} WHERE {} = %s;").format(
+        sql.Identifier(table_name),
+        sql.SQL(", ").join(sql.SQL("{} = %s").format(sql.Identifier(c)) for c in columns),
+        sql.Identifier(pk_col),
+    )
+
+
+@lru_cache(maxsize=256)
+def delete_statement(table_name: str, pk_col: str) -> sql.Composed:
+    return sql.SQL("DELETE FROM {} WHERE {} = %s;").format(
+        sql.Identifier(table_name),
+        sql.Identifier(pk_col),
+    )
+